@@ -0,0 +1,54 @@
+"""
+JSON Records Module
+
+This module reads the record lists stored in the pipeline's JSON data files
+(scraped content, processed documents, chunks), stream-parsing them with
+ijson when it is installed.
+"""
+
+import json
+from typing import Dict, Iterator, List
+
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+
+def iter_json_records(filepath: str, key: str) -> Iterator[Dict]:
+    """
+    Iterate over the list stored under a top-level key of a JSON data file.
+
+    With ijson installed the records are stream-parsed one at a time, so
+    only the records still referenced by the caller are held in memory;
+    otherwise the file is loaded with json.load.
+
+    Args:
+        filepath: Path to the JSON file
+        key: Top-level key holding the list of records
+
+    Yields:
+        Records under ``key`` (nothing if the key is missing)
+    """
+    if IJSON_AVAILABLE:
+        with open(filepath, "rb") as f:
+            yield from ijson.items(f, f"{key}.item", use_float=True)
+        return
+
+    with open(filepath, "r", encoding="utf-8") as f:
+        yield from json.load(f).get(key, [])
+
+
+def load_json_records(filepath: str, key: str) -> List[Dict]:
+    """
+    Load the list stored under a top-level key of a JSON data file.
+
+    Args:
+        filepath: Path to the JSON file
+        key: Top-level key holding the list of records
+
+    Returns:
+        List of records (empty if the key is missing)
+    """
+    return list(iter_json_records(filepath, key))
@@ -0,0 +1,56 @@
+"""
+Unit tests for the json_records module
+"""
+
+import json
+
+import pytest
+import json_records
+from json_records import iter_json_records, load_json_records
+
+
+@pytest.fixture
+def chunks_file(tmp_path):
+    """Write a small chunks file with an extra top-level key."""
+    path = tmp_path / "chunks.json"
+    data = {
+        "metadata": {"total_chunks": 2},
+        "chunks": [
+            {"chunk_id": "chunk-1", "embedding": [0.1, 0.2]},
+            {"chunk_id": "chunk-2", "embedding": [0.3, 0.4]},
+        ],
+    }
+    path.write_text(json.dumps(data), encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.parametrize("use_ijson", [True, False])
+def test_iter_json_records(chunks_file, monkeypatch, use_ijson):
+    """Test iterating records with and without ijson."""
+    if use_ijson and not json_records.IJSON_AVAILABLE:
+        pytest.skip("ijson not installed")
+    monkeypatch.setattr(json_records, "IJSON_AVAILABLE", use_ijson)
+
+    records = list(iter_json_records(chunks_file, "chunks"))
+
+    assert [record["chunk_id"] for record in records] == ["chunk-1", "chunk-2"]
+    assert records[1]["embedding"] == [0.3, 0.4]
+    assert type(records[0]["embedding"][0]) is float
+
+
+@pytest.mark.parametrize("use_ijson", [True, False])
+def test_missing_key_yields_nothing(chunks_file, monkeypatch, use_ijson):
+    """Test that a missing top-level key gives no records."""
+    if use_ijson and not json_records.IJSON_AVAILABLE:
+        pytest.skip("ijson not installed")
+    monkeypatch.setattr(json_records, "IJSON_AVAILABLE", use_ijson)
+
+    assert load_json_records(chunks_file, "scraped_content") == []
+
+
+def test_load_json_records(chunks_file):
+    """Test loading records into a list."""
+    records = load_json_records(chunks_file, "chunks")
+
+    assert isinstance(records, list)
+    assert len(records) == 2
@@ -103,10 +103,15 @@ class IngestionPipeline:
             "chunks_created": 0,
             "chunks_embedded": 0,
             "chunks_stored": 0,
+            "chunks_skipped_duplicates": 0,
             "chunks_mapped_to_groww": 0,
             "errors": [],
         }
 
+        # Data produced by the last successful run, kept so callers can
+        # validate it without re-reading the output files
+        self.outputs: Dict[str, List[Dict]] = {}
+
     def run(self, skip_scraping: bool = False, reset_database: bool = False) -> Dict:
         """
         Run the complete ingestion pipeline.
@@ -149,15 +154,18 @@ class IngestionPipeline:
                 logger.info("Resetting vector database...")
                 self.vectordb.reset()
 
-            self._store_in_vectordb(chunks_with_mappings)
+            stored_chunks = self._store_in_vectordb(chunks_with_mappings)
 
             # Step 7: Update metadata manager
-            self._update_metadata(scraped_data, chunks_with_mappings)
+            self._update_metadata(scraped_data, stored_chunks)
 
             # Step 8: Save intermediate outputs
-            self._save_outputs(
-                scraped_data, processed_docs, chunks_with_embeddings, chunks_with_mappings
-            )
+            self._save_outputs(scraped_data, processed_docs, chunks_with_embeddings, stored_chunks)
+            self.outputs = {
+                "scraped_data": scraped_data,
+                "processed_docs": processed_docs,
+                "chunks": chunks_with_embeddings,
+            }
 
             # Finalize statistics
             self.stats["end_time"] = datetime.now().isoformat()
@@ -285,16 +293,28 @@ class IngestionPipeline:
             self.stats["errors"].append(f"Groww Mapping: {str(e)}")
             raise
 
-    def _store_in_vectordb(self, chunks: List[Dict]) -> None:
-        """Store chunks in vector database."""
+    def _store_in_vectordb(self, chunks: List[Dict]) -> List[Dict]:
+        """
+        Store chunks in vector database, skipping duplicate content.
+
+        Returns:
+            The chunks without those skipped as duplicates, so metadata and
+            saved outputs only list chunks that are in the database
+        """
         logger.info("\n" + "=" * 80)
         logger.info("Step 6: Storing in Vector Database")
         logger.info("=" * 80)
 
         try:
-            self.vectordb.add_chunks(chunks)
+            add_stats = self.vectordb.add_chunks(chunks, skip_duplicates=True)
+            self.stats["chunks_skipped_duplicates"] = add_stats["skipped_duplicates"]
             self.stats["chunks_stored"] = self.vectordb.count()
             logger.info(f"Successfully stored {self.stats['chunks_stored']} chunks in vector database")
+
+            skipped_ids = set(add_stats["skipped_ids"])
+            if not skipped_ids:
+                return chunks
+            return [chunk for chunk in chunks if chunk.get("chunk_id") not in skipped_ids]
         except Exception as e:
             logger.error(f"Vector database storage failed: {e}")
             self.stats["errors"].append(f"VectorDB Storage: {str(e)}")
@@ -437,6 +457,10 @@ class IngestionPipeline:
         print(f"  - Chunks created: {self.stats['chunks_created']}")
         print(f"  - Chunks embedded: {self.stats['chunks_embedded']}")
         print(f"  - Chunks stored: {self.stats['chunks_stored']}")
+        skipped = self.stats["chunks_skipped_duplicates"]
+        embedded = self.stats["chunks_embedded"]
+        skipped_share = f" ({skipped / embedded:.1%} of embedded)" if embedded else ""
+        print(f"  - Duplicate chunks skipped: {skipped}{skipped_share}")
         print(f"  - Chunks mapped to Groww: {self.stats['chunks_mapped_to_groww']}")
 
         if self.stats["errors"]:
@@ -66,6 +66,7 @@ def test_pipeline_stats_initialization(pipeline):
     assert stats["chunks_created"] == 0
     assert stats["chunks_embedded"] == 0
     assert stats["chunks_stored"] == 0
+    assert stats["chunks_skipped_duplicates"] == 0
     assert stats["chunks_mapped_to_groww"] == 0
     assert stats["errors"] == []
 
@@ -208,6 +209,27 @@ def test_save_outputs(pipeline):
     assert os.path.exists(os.path.join(TEST_OUTPUT_DIR, "chunks_final.json"))
 
 
+def test_store_in_vectordb_skips_duplicates(pipeline):
+    """Test that duplicate chunks are skipped and left out of the stored chunks."""
+    chunks = [
+        {
+            "chunk_id": f"test-{i}",
+            "content": "Same test chunk",
+            "embedding": [0.1] * 384,
+            "source_url": "https://example.com/fund",
+            "chunk_index": i,
+            "metadata": {"amc_name": "Test AMC"},
+        }
+        for i in range(2)
+    ]
+
+    stored_chunks = pipeline._store_in_vectordb(chunks)
+
+    assert [chunk["chunk_id"] for chunk in stored_chunks] == ["test-0"]
+    assert pipeline.stats["chunks_skipped_duplicates"] == 1
+    assert pipeline.stats["chunks_stored"] == 1
+
+
 def test_output_directory_creation(pipeline):
     """Test that output directory is created."""
     assert os.path.exists(TEST_OUTPUT_DIR)
@@ -0,0 +1,20 @@
+"""
+Shared pytest configuration for the validation test suite.
+"""
+
+import sys
+from pathlib import Path
+
+# Make the data_ingestion modules importable once for every test module
+DATA_INGESTION_DIR = str(Path(__file__).resolve().parent.parent)
+if DATA_INGESTION_DIR not in sys.path:
+    sys.path.insert(0, DATA_INGESTION_DIR)
+
+
+def pytest_configure(config):
+    """Register markers used by the validation tests."""
+    # Provided by pytest-xdist; registered here so runs without it stay quiet
+    config.addinivalue_line(
+        "markers",
+        "xdist_group(name): run tests sharing a group name on the same xdist worker",
+    )
@@ -12,11 +12,6 @@ This module tests the quality of scraped data including:
 import pytest
 import json
 import os
-import sys
-from pathlib import Path
-
-# Add parent directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from validator import DataValidator
 
@@ -11,13 +11,8 @@ This module tests that:
 
 import pytest
 import json
-import sys
-from pathlib import Path
 from collections import defaultdict
 
-# Add parent directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent))
-
 from groww_mapper import GrowwMapper
 
 
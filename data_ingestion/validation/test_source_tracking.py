@@ -10,39 +10,35 @@ This module tests that:
 
 import pytest
 import json
-import sys
+import numpy as np
 from pathlib import Path
-from collections import defaultdict
-
-# Add parent directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent))
+from collections import Counter, defaultdict
+from functools import lru_cache
 
+from json_records import iter_json_records
 from metadata_manager import MetadataManager
-from source_tracker import SourceTracker
-
+from source_tracker import SourceURLTracker
 
-@pytest.fixture
-def metadata_manager():
-    """Create a metadata manager instance."""
-    return MetadataManager(metadata_file="data/test_metadata_index.json")
+SOURCE_URLS_FILE = Path("data/source_urls.json")
+CHUNKS_FILE = Path("data/chunks_with_embeddings.json")
 
 
-@pytest.fixture
-def source_tracker():
-    """Create a source tracker instance."""
-    return SourceTracker(source_file="data/source_urls.json")
+@lru_cache(maxsize=None)
+def load_sample_chunks() -> tuple:
+    """
+    Load sample chunks once per session, or fall back to mock data.
 
-
-@pytest.fixture
-def sample_chunks():
-    """Load sample chunks or create mock data."""
+    Chunks are streamed with iter_json_records and kept without their embeddings,
+    which none of these tests read.
+    """
     try:
-        with open("data/chunks_with_embeddings.json", "r", encoding="utf-8") as f:
-            data = json.load(f)
-            return data.get("chunks", [])
+        return tuple(
+            {key: value for key, value in chunk.items() if key != "embedding"}
+            for chunk in iter_json_records(CHUNKS_FILE, "chunks")
+        )
     except FileNotFoundError:
         # Return mock data for testing
-        return [
+        return (
             {
                 "chunk_id": "test-chunk-1",
                 "content": "HDFC Equity Fund has an expense ratio of 1.5%",
@@ -53,7 +49,6 @@ def sample_chunks():
                     "amc_id": "hdfc",
                     "title": "HDFC Equity Fund",
                 },
-                "embedding": [0.1] * 384,
             },
             {
                 "chunk_id": "test-chunk-2",
@@ -65,35 +60,163 @@ def sample_chunks():
                     "amc_id": "hdfc",
                     "title": "HDFC Equity Fund",
                 },
-                "embedding": [0.2] * 384,
             },
-        ]
+        )
+
+
+def pytest_generate_tests(metafunc):
+    """
+    Parametrize per-chunk tests with one case per sample chunk.
+
+    Each case is grouped by source URL so that, under
+    ``pytest -n auto --dist=loadgroup``, chunks from the same page run on
+    the same worker.
+    """
+    if "chunk" in metafunc.fixturenames:
+        metafunc.parametrize(
+            "chunk",
+            [
+                pytest.param(
+                    chunk,
+                    id=str(chunk.get("chunk_id", i)),
+                    marks=pytest.mark.xdist_group(name=str(chunk.get("source_url"))),
+                )
+                for i, chunk in enumerate(load_sample_chunks())
+            ],
+        )
+
+
+@pytest.fixture(scope="session")
+def prepopulated_manager(sample_chunks):
+    """
+    Create a metadata manager populated with the first sample chunks.
+
+    Statistics and validation results are computed once and returned with
+    the manager as ``(manager, stats, validation)`` for read-only tests.
+    """
+    manager = MetadataManager(metadata_file="data/test_metadata_index.json")
+    for chunk in sample_chunks[:10]:
+        manager.register_chunk(chunk)
+
+    return manager, manager.get_statistics(), manager.validate_metadata()
+
+
+@pytest.fixture
+def metadata_manager_scratch(prepopulated_manager):
+    """
+    Lend the shared metadata manager to a test that registers new chunks.
+
+    Only the chunk IDs present on entry are recorded; on teardown any chunk
+    registered by the test is removed from the registry and the URL/AMC
+    mappings, avoiding a deep copy of the whole manager per test.
+    """
+    manager, _, _ = prepopulated_manager
+    pre_ids = set(manager.chunk_registry)
+
+    yield manager
+
+    new_ids = set(manager.chunk_registry) - pre_ids
+    if not new_ids:
+        return
+
+    for chunk_id in new_ids:
+        del manager.chunk_registry[chunk_id]
+
+    for mapping in (manager.url_to_chunks, manager.amc_to_chunks):
+        for key in list(mapping):
+            kept = [chunk_id for chunk_id in mapping[key] if chunk_id not in new_ids]
+            if kept:
+                mapping[key] = kept
+            else:
+                del mapping[key]
+
+
+@pytest.fixture(scope="session")
+def source_urls():
+    """Load the configured AMC source URLs, skipping if the file is missing."""
+    if not SOURCE_URLS_FILE.exists():
+        pytest.skip(f"Source URLs file not found: {SOURCE_URLS_FILE}")
+    with open(SOURCE_URLS_FILE, "r", encoding="utf-8") as f:
+        return json.load(f).get("amcs", [])
+
+
+@pytest.fixture(scope="session")
+def source_tracker(source_urls, tmp_path_factory):
+    """
+    Create a source tracker populated from the configured source URLs.
+
+    The tracker is shared across the session because these tests only read
+    from it; its storage file lives in a temporary directory and is never
+    saved. validate_source (an HTTP HEAD request) is not called.
+    """
+    storage_file = tmp_path_factory.mktemp("source_tracking") / "source_tracking.json"
+    tracker = SourceURLTracker(storage_file=str(storage_file))
+    for amc in source_urls:
+        for url in amc.get("urls", []):
+            tracker.add_source(url, amc_name=amc["name"])
+    return tracker
+
+
+@pytest.fixture(scope="session")
+def sample_chunks():
+    """Load sample chunks or create mock data."""
+    return list(load_sample_chunks())
+
+
+@pytest.fixture(scope="session")
+def chunk_indexes(sample_chunks):
+    """
+    Build URL and AMC statistics for the sample chunks in a single pass.
+
+    Coverage tests read the precomputed counts instead of rescanning the
+    chunk list on their own.
+    """
+    url_counts = Counter()
+    amc_counts = Counter()
+
+    for chunk in sample_chunks:
+        source_url = chunk.get("source_url")
+        if source_url:
+            url_counts[source_url] += 1
+
+        amc_name = chunk.get("metadata", {}).get("amc_name")
+        if amc_name:
+            amc_counts[amc_name] += 1
+
+    return {
+        "total_chunks": len(sample_chunks),
+        "chunks_with_urls": sum(url_counts.values()),
+        "chunks_with_amc": sum(amc_counts.values()),
+        "unique_urls": set(url_counts),
+        "url_counts": url_counts,
+        "amc_counts": amc_counts,
+    }
 
 
 class TestSourceURLStorage:
     """Test suite for source URL storage."""
 
-    def test_all_chunks_have_source_url(self, sample_chunks):
-        """Test that all chunks have a source URL."""
-        for i, chunk in enumerate(sample_chunks):
-            assert "source_url" in chunk, f"Chunk {i} missing source_url field"
-            
-            source_url = chunk.get("source_url")
-            assert source_url, f"Chunk {i} has empty source_url"
-            assert isinstance(source_url, str), f"Chunk {i} source_url is not a string"
+    def test_chunk_has_source_url(self, chunk):
+        """Test that each chunk has a source URL."""
+        chunk_id = chunk.get("chunk_id")
+        assert "source_url" in chunk, f"Chunk {chunk_id} missing source_url field"
 
-    def test_source_url_format(self, sample_chunks):
+        source_url = chunk.get("source_url")
+        assert source_url, f"Chunk {chunk_id} has empty source_url"
+        assert type(source_url) is str, f"Chunk {chunk_id} source_url is not a string"
+
+    def test_source_url_format(self, chunk):
         """Test that source URLs have valid format."""
-        for i, chunk in enumerate(sample_chunks):
-            source_url = chunk.get("source_url", "")
-            
-            # Check URL starts with http/https
-            assert source_url.startswith("http"), (
-                f"Chunk {i} source_url doesn't start with http/https: {source_url}"
-            )
-            
-            # Check URL has a domain
-            assert "://" in source_url, f"Chunk {i} source_url missing protocol separator"
+        chunk_id = chunk.get("chunk_id")
+        source_url = chunk.get("source_url", "")
+
+        # Check URL starts with http/https
+        assert source_url.startswith("http"), (
+            f"Chunk {chunk_id} source_url doesn't start with http/https: {source_url}"
+        )
+
+        # Check URL has a domain
+        assert "://" in source_url, f"Chunk {chunk_id} source_url missing protocol separator"
 
     def test_source_url_consistency(self, sample_chunks):
         """Test that source URLs are consistent across related chunks."""
@@ -175,129 +298,135 @@ class TestChunkToURLLinking:
                 url_to_indices[source_url].append(chunk_index)
         
         # Check indices are sequential for each URL
+        max_gap = 5  # Allow some gaps for filtering
         for url, indices in url_to_indices.items():
-            sorted_indices = sorted(indices)
-            
+            sorted_indices = np.sort(np.fromiter(indices, dtype=np.int64, count=len(indices)))
+
             # Should start at 0
-            if sorted_indices:
+            if sorted_indices.size:
                 assert sorted_indices[0] == 0, (
                     f"URL {url} chunk indices don't start at 0: {sorted_indices[0]}"
                 )
-            
+
             # Should be continuous (allowing for some missing chunks)
-            max_gap = 5  # Allow some gaps for filtering
-            for i in range(len(sorted_indices) - 1):
-                gap = sorted_indices[i + 1] - sorted_indices[i]
-                assert gap <= max_gap, (
-                    f"URL {url} has large gap in chunk indices: {sorted_indices}"
+            if sorted_indices.size > 1:
+                assert np.diff(sorted_indices).max() <= max_gap, (
+                    f"URL {url} has large gap in chunk indices: {sorted_indices.tolist()}"
                 )
 
 
 class TestMetadataLinking:
     """Test suite for metadata linking to source URLs."""
 
-    def test_metadata_contains_source_info(self, sample_chunks):
+    def test_metadata_contains_source_info(self, chunk):
         """Test that metadata contains source information."""
-        for i, chunk in enumerate(sample_chunks):
-            metadata = chunk.get("metadata", {})
-            
-            assert isinstance(metadata, dict), f"Chunk {i} metadata is not a dict"
-            
-            # Check for key metadata fields related to source
-            source_url = chunk.get("source_url")
-            if source_url:
-                # At least one of these should be present
-                has_source_info = (
-                    "amc_name" in metadata
-                    or "title" in metadata
-                    or "url" in metadata
-                )
-                assert has_source_info, (
-                    f"Chunk {i} metadata missing source information"
-                )
+        chunk_id = chunk.get("chunk_id")
+        metadata = chunk.get("metadata", {})
+
+        assert isinstance(metadata, dict), f"Chunk {chunk_id} metadata is not a dict"
+
+        # Check for key metadata fields related to source
+        source_url = chunk.get("source_url")
+        if source_url:
+            # At least one of these should be present
+            has_source_info = (
+                "amc_name" in metadata
+                or "title" in metadata
+                or "url" in metadata
+            )
+            assert has_source_info, (
+                f"Chunk {chunk_id} metadata missing source information"
+            )
 
-    def test_amc_name_in_metadata(self, sample_chunks):
+    def test_amc_name_in_metadata(self, chunk_indexes):
         """Test that AMC name is stored in metadata."""
-        chunks_with_amc = 0
-        
-        for chunk in sample_chunks:
-            metadata = chunk.get("metadata", {})
-            amc_name = metadata.get("amc_name")
-            
-            if amc_name:
-                chunks_with_amc += 1
-                assert isinstance(amc_name, str), "AMC name should be a string"
-                assert len(amc_name) > 0, "AMC name should not be empty"
-        
+        for amc_name in chunk_indexes["amc_counts"]:
+            assert type(amc_name) is str and amc_name, "AMC name should be a non-empty string"
+
         # Most chunks should have AMC name
-        coverage = chunks_with_amc / len(sample_chunks) if sample_chunks else 0
+        total_chunks = chunk_indexes["total_chunks"]
+        coverage = chunk_indexes["chunks_with_amc"] / total_chunks if total_chunks else 0
         assert coverage >= 0.8, (
             f"Only {coverage:.1%} of chunks have AMC name in metadata"
         )
 
-    def test_metadata_url_matches_source_url(self, sample_chunks):
+    def test_metadata_url_matches_source_url(self, chunk):
         """Test that metadata URL matches chunk source URL."""
-        for i, chunk in enumerate(sample_chunks):
-            source_url = chunk.get("source_url")
-            metadata = chunk.get("metadata", {})
-            metadata_url = metadata.get("url")
-            
-            if source_url and metadata_url:
-                assert source_url == metadata_url, (
-                    f"Chunk {i} source_url and metadata.url don't match: "
-                    f"{source_url} vs {metadata_url}"
-                )
+        source_url = chunk.get("source_url")
+        metadata_url = chunk.get("metadata", {}).get("url")
+
+        if source_url and metadata_url:
+            assert source_url == metadata_url, (
+                f"Chunk {chunk.get('chunk_id')} source_url and metadata.url don't match: "
+                f"{source_url} vs {metadata_url}"
+            )
 
 
 class TestMetadataManagerIntegration:
     """Test suite for metadata manager integration."""
 
-    def test_metadata_manager_registration(self, metadata_manager, sample_chunks):
+    def test_metadata_manager_registration(self, metadata_manager_scratch, sample_chunks):
         """Test that metadata manager can register chunks."""
-        for chunk in sample_chunks[:5]:  # Test with first 5 chunks
-            metadata_manager.register_chunk(chunk)
-        
+        # Copies of the first 5 chunks under IDs the shared manager has not seen
+        new_chunks = [
+            {**chunk, "chunk_id": f"{chunk.get('chunk_id')}-registration"}
+            for chunk in sample_chunks[:5]
+        ]
+        total_before = metadata_manager_scratch.get_statistics()["total_chunks"]
+
+        for chunk in new_chunks:
+            metadata_manager_scratch.register_chunk(chunk)
+
         # Verify chunks are registered
-        stats = metadata_manager.get_statistics()
-        assert stats["total_chunks"] >= 5, "Chunks not properly registered"
+        stats = metadata_manager_scratch.get_statistics()
+        assert stats["total_chunks"] == total_before + len(new_chunks), (
+            "Chunks not properly registered"
+        )
 
-    def test_get_chunks_by_url(self, metadata_manager, sample_chunks):
+    def test_register_new_chunk(self, metadata_manager_scratch):
+        """Test that a newly registered chunk can be looked up."""
+        chunk = {
+            "chunk_id": "scratch-chunk-1",
+            "content": "Scratch chunk content",
+            "source_url": "https://groww.in/mutual-funds/scratch-fund",
+            "chunk_index": 0,
+            "metadata": {"amc_name": "Scratch Mutual Fund"},
+        }
+        metadata_manager_scratch.register_chunk(chunk)
+
+        assert metadata_manager_scratch.get_chunk_metadata("scratch-chunk-1") is not None
+        assert metadata_manager_scratch.get_chunks_by_url(chunk["source_url"]) == [
+            "scratch-chunk-1"
+        ]
+
+    def test_get_chunks_by_url(self, prepopulated_manager, sample_chunks):
         """Test retrieving chunks by URL."""
-        # Register chunks
-        for chunk in sample_chunks[:10]:
-            metadata_manager.register_chunk(chunk)
-        
+        manager, _, _ = prepopulated_manager
+
         # Get chunks by URL
         if sample_chunks:
             test_url = sample_chunks[0].get("source_url")
             if test_url:
-                chunks = metadata_manager.get_chunks_by_url(test_url)
+                chunks = manager.get_chunks_by_url(test_url)
                 assert isinstance(chunks, list), "Should return a list"
                 assert len(chunks) > 0, f"Should find chunks for URL: {test_url}"
 
-    def test_get_chunks_by_amc(self, metadata_manager, sample_chunks):
+    def test_get_chunks_by_amc(self, prepopulated_manager, sample_chunks):
         """Test retrieving chunks by AMC."""
-        # Register chunks
-        for chunk in sample_chunks[:10]:
-            metadata_manager.register_chunk(chunk)
-        
+        manager, _, _ = prepopulated_manager
+
         # Get chunks by AMC
         if sample_chunks:
             test_amc = sample_chunks[0].get("metadata", {}).get("amc_name")
             if test_amc:
-                chunks = metadata_manager.get_chunks_by_amc(test_amc)
+                chunks = manager.get_chunks_by_amc(test_amc)
                 assert isinstance(chunks, list), "Should return a list"
                 assert len(chunks) > 0, f"Should find chunks for AMC: {test_amc}"
 
-    def test_metadata_validation(self, metadata_manager, sample_chunks):
+    def test_metadata_validation(self, prepopulated_manager):
         """Test metadata validation for registered chunks."""
-        # Register chunks
-        for chunk in sample_chunks[:10]:
-            metadata_manager.register_chunk(chunk)
-        
-        # Validate metadata
-        validation = metadata_manager.validate_metadata()
-        
+        _, _, validation = prepopulated_manager
+
         assert "valid" in validation, "Validation should return validity status"
         assert "issues" in validation, "Validation should return issues list"
 
@@ -305,34 +434,40 @@ class TestMetadataManagerIntegration:
 class TestSourceTracker:
     """Test suite for source tracker."""
 
-    def test_source_urls_loaded(self, source_tracker):
+    def test_source_urls_loaded(self, source_tracker, source_urls):
         """Test that source URLs are loaded."""
         sources = source_tracker.get_all_sources()
-        
-        assert isinstance(sources, dict), "Sources should be a dictionary"
+        expected_urls = {url for amc in source_urls for url in amc.get("urls", [])}
+
+        assert isinstance(sources, list), "Sources should be a list"
         assert len(sources) > 0, "Should have source URLs loaded"
+        assert {source["url"] for source in sources} == expected_urls
+
+    def test_source_lookup_by_url(self, source_tracker):
+        """Test looking up tracked sources by URL."""
+        for source in source_tracker.get_all_sources():
+            url = source["url"]
+            assert source_tracker.get_source_by_url(url) is source, (
+                f"Lookup by URL returned a different source: {url}"
+            )
+            assert source["domain"], f"Source has no domain: {url}"
 
-    def test_url_validation(self, source_tracker):
-        """Test URL validation functionality."""
-        # Valid URL
-        valid_url = "https://groww.in/mutual-funds/hdfc-equity-fund"
-        assert source_tracker.validate_url(valid_url), "Valid URL should pass"
-        
-        # Invalid URL
-        invalid_url = "not-a-url"
-        assert not source_tracker.validate_url(invalid_url), "Invalid URL should fail"
+        # Untracked URL
+        assert source_tracker.get_source_by_url("not-a-url") is None
 
-    def test_amc_url_mapping(self, source_tracker):
+    def test_amc_url_mapping(self, source_tracker, source_urls):
         """Test AMC to URL mapping."""
-        sources = source_tracker.get_all_sources()
-        
-        for amc_name, urls in sources.items():
-            assert isinstance(urls, list), f"URLs for {amc_name} should be a list"
-            assert len(urls) > 0, f"AMC {amc_name} should have URLs"
-            
+        for amc in source_urls:
+            amc_name = amc["name"]
+            sources = source_tracker.get_sources_by_amc(amc_name)
+
+            assert len(sources) > 0, f"AMC {amc_name} should have URLs"
+            assert {source["url"] for source in sources} == set(amc.get("urls", []))
+
             # Verify all URLs are valid
-            for url in urls:
-                assert isinstance(url, str), "Each URL should be a string"
+            for source in sources:
+                url = source["url"]
+                assert type(url) is str, "Each URL should be a string"
                 assert url.startswith("http"), f"Invalid URL format: {url}"
 
 
@@ -378,58 +513,48 @@ class TestSourceLinkageIntegrity:
                     f"Reverse mapping mismatch for chunk {chunk_id}"
                 )
 
-    def test_coverage_statistics(self, sample_chunks):
+    def test_coverage_statistics(self, chunk_indexes):
         """Test source URL coverage statistics."""
-        unique_urls = set()
-        chunks_with_urls = 0
-        
-        for chunk in sample_chunks:
-            source_url = chunk.get("source_url")
-            if source_url:
-                unique_urls.add(source_url)
-                chunks_with_urls += 1
-        
+        total_chunks = chunk_indexes["total_chunks"]
+
         # All chunks should have URLs
-        coverage = chunks_with_urls / len(sample_chunks) if sample_chunks else 0
+        coverage = chunk_indexes["chunks_with_urls"] / total_chunks if total_chunks else 0
         assert coverage == 1.0, f"Only {coverage:.1%} of chunks have source URLs"
-        
+
         # Should have multiple unique URLs
-        assert len(unique_urls) > 0, "No unique source URLs found"
+        assert len(chunk_indexes["unique_urls"]) > 0, "No unique source URLs found"
 
 
 def test_source_tracking_integration():
     """Integration test for complete source tracking system."""
     # This test validates the entire source tracking workflow
     
-    # Load sample data
-    try:
-        with open("data/chunks_with_embeddings.json", "r", encoding="utf-8") as f:
-            data = json.load(f)
-            chunks = data.get("chunks", [])
-    except FileNotFoundError:
+    if not CHUNKS_FILE.exists():
         pytest.skip("No chunks data available for integration test")
-    
-    if not chunks:
-        pytest.skip("No chunks available for integration test")
-    
+
     # Create metadata manager
     manager = MetadataManager(metadata_file="data/test_metadata_index.json")
-    
-    # Register all chunks
-    for chunk in chunks:
+
+    # Stream and register all chunks
+    total_chunks = 0
+    for chunk in iter_json_records(CHUNKS_FILE, "chunks"):
         manager.register_chunk(chunk)
-    
+        total_chunks += 1
+
+    if not total_chunks:
+        pytest.skip("No chunks available for integration test")
+
     # Get statistics
     stats = manager.get_statistics()
     
     # Verify statistics
-    assert stats["total_chunks"] == len(chunks)
+    assert stats["total_chunks"] == total_chunks
     assert stats["total_sources"] > 0
     assert stats["total_amcs"] > 0
     
     # Validate metadata
     validation = manager.validate_metadata()
-    assert validation["valid"] or validation["total_issues"] < len(chunks) * 0.1
+    assert validation["valid"] or validation["total_issues"] < total_chunks * 0.1
 
 
 if __name__ == "__main__":
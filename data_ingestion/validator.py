@@ -5,27 +5,109 @@ This module implements validation and quality checks for scraped and processed d
 including duplicate detection, content validation, and data integrity checks.
 """
 
+import json
 import logging
 import re
-from typing import Dict, List, Set, Tuple, Optional
-from collections import defaultdict
+from typing import Dict, Iterable, List, Set, Tuple, Optional
+from collections import Counter, defaultdict
+from functools import lru_cache
+from math import isfinite
+from urllib.parse import urlsplit
 import hashlib
 
+import numpy as np
+
+from json_records import load_json_records
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+try:
+    from datasketch import MinHash, MinHashLSH
+    DATASKETCH_AVAILABLE = True
+except ImportError:
+    DATASKETCH_AVAILABLE = False
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Compiled once at import time rather than on every call
+_WS_RE = re.compile(r"\s+")
+
+
+def _hash_content(content: str) -> int:
+    """
+    Hash normalized content for duplicate detection.
+
+    Uses 128-bit xxHash3 when available (non-cryptographic, much faster than
+    MD5) and falls back to MD5. Either way the hash is returned as an int,
+    which is cheaper to store and compare as a dict key.
+    """
+    # Normalize content
+    return _hash_normalized(_WS_RE.sub(" ", content.lower().strip()))
+
+
+def _hash_normalized(normalized: str) -> int:
+    """Hash content that is already lowercased and whitespace-normalized."""
+    data = normalized.encode()
+    if XXHASH_AVAILABLE:
+        return xxhash.xxh3_128_intdigest(data)
+    return int.from_bytes(hashlib.md5(data).digest(), "big")
+
+
+@lru_cache(maxsize=100_000)
+def _is_valid_url(url: str) -> bool:
+    """
+    Check URL format (http(s) scheme, a host and no whitespace).
+
+    Memoized because chunks from the same page repeat the same source URL.
+    """
+    if _WS_RE.search(url):
+        return False
+
+    try:
+        parts = urlsplit(url)
+        host = parts.hostname
+        parts.port  # Raises ValueError for a malformed port
+    except ValueError:
+        return False
+
+    if parts.scheme.lower() not in ("http", "https") or not host:
+        return False
+
+    return host == "localhost" or "." in host.strip(".")
+
 
 class DataValidator:
     """
     Validates data quality throughout the ingestion pipeline.
     """
 
+    # Words added per step when checking content for repetition
+    UNIQUE_WORDS_BLOCK = 256
+
+    # Number of most common URLs reported in url_distribution by default
+    TOP_URLS = 100
+
+    # Near-duplicate detection parameters (MinHash LSH)
+    SHINGLE_SIZE = 5
+    MINHASH_NUM_PERM = 128
+
+    # Required fields per record type
+    SCRAPED_REQUIRED_FIELDS = frozenset(("url", "content"))
+    PROCESSED_REQUIRED_FIELDS = frozenset(("content", "metadata"))
+    CHUNK_REQUIRED_FIELDS = frozenset(("chunk_id", "content", "source_url"))
+
     def __init__(
         self,
         min_content_length: int = 50,
         max_content_length: int = 100000,
         duplicate_threshold: float = 0.9,
+        detect_near_duplicates: bool = False,
     ):
         """
         Initialize the data validator.
@@ -34,10 +116,14 @@ class DataValidator:
             min_content_length: Minimum acceptable content length
             max_content_length: Maximum acceptable content length
             duplicate_threshold: Similarity threshold for duplicate detection (0-1)
+            detect_near_duplicates: Also report near-duplicate content (requires
+                datasketch). Off by default: the MinHash pass takes
+                validate_chunks on 4,000 chunks from ~0.1 s to ~2 s
         """
         self.min_content_length = min_content_length
         self.max_content_length = max_content_length
         self.duplicate_threshold = duplicate_threshold
+        self.detect_near_duplicates = detect_near_duplicates
 
         self.validation_results = {
             "total_items_validated": 0,
@@ -62,11 +148,25 @@ class DataValidator:
         logger.info(f"Validating {len(scraped_data)} scraped documents")
 
         issues = []
-        duplicates = self._detect_duplicates(scraped_data)
+        duplicates = []
+        content_hashes = {}
+        unique_contents = []
 
+        # Single pass: duplicate hashing and per-document checks share locals
         for i, doc in enumerate(scraped_data):
+            url = doc.get("url")
+            content = doc.get("content", "")
+            words, content_hash = self._prepare_content(content)
+
+            # Track exact duplicates (same as _detect_duplicates)
+            first = content_hashes.setdefault(content_hash, i)
+            if first != i:
+                duplicates.append((first, i))
+            else:
+                unique_contents.append((i, words))
+
             # Check required fields
-            if not self._validate_required_fields(doc, ["url", "content"]):
+            if not self._validate_required_fields(doc, self.SCRAPED_REQUIRED_FIELDS):
                 issues.append(
                     {
                         "type": "missing_fields",
@@ -77,43 +177,48 @@ class DataValidator:
                 continue
 
             # Validate URL
-            if not self._validate_url(doc.get("url")):
+            if not self._validate_url(url):
                 issues.append(
                     {
                         "type": "invalid_url",
                         "index": i,
-                        "url": doc.get("url"),
+                        "url": url,
                     }
                 )
 
             # Validate content length
-            content = doc.get("content", "")
             if not self._validate_content_length(content):
                 issues.append(
                     {
                         "type": "invalid_content_length",
                         "index": i,
-                        "url": doc.get("url"),
+                        "url": url,
                         "length": len(content),
                     }
                 )
 
             # Check for empty or low-quality content
-            if self._is_low_quality_content(content):
+            if self._is_low_quality_content(content, words):
                 issues.append(
                     {
                         "type": "low_quality_content",
                         "index": i,
-                        "url": doc.get("url"),
+                        "url": url,
                     }
                 )
 
+        near_duplicates = []
+        if self.detect_near_duplicates:
+            near_duplicates = self._detect_near_duplicates(unique_contents)
+
         results = {
             "total_documents": len(scraped_data),
             "valid_documents": len(scraped_data) - len(issues),
             "issues": issues,
             "duplicates": duplicates,
             "duplicate_count": len(duplicates),
+            "near_duplicates": near_duplicates,
+            "near_duplicate_count": len(near_duplicates),
         }
 
         logger.info(
@@ -123,6 +228,8 @@ class DataValidator:
             logger.warning(f"Found {len(issues)} issues")
         if len(duplicates) > 0:
             logger.warning(f"Found {len(duplicates)} duplicate documents")
+        if len(near_duplicates) > 0:
+            logger.warning(f"Found {len(near_duplicates)} near-duplicate document pairs")
 
         return results
 
@@ -142,7 +249,7 @@ class DataValidator:
 
         for i, doc in enumerate(processed_docs):
             # Check required fields
-            if not self._validate_required_fields(doc, ["content", "metadata"]):
+            if not self._validate_required_fields(doc, self.PROCESSED_REQUIRED_FIELDS):
                 issues.append(
                     {
                         "type": "missing_fields",
@@ -194,12 +301,20 @@ class DataValidator:
         logger.info(f"Validating {len(chunks)} chunks")
 
         issues = []
-        chunk_duplicates = self._detect_duplicate_chunks(chunks)
+        contents = [chunk.get("content", "") for chunk in chunks]
+        chunk_ids = [chunk.get("chunk_id", "") for chunk in chunks]
+        pairs, unique_indices = self._find_exact_duplicates(contents)
+        chunk_duplicates = [(chunk_ids[first], chunk_ids[i]) for first, i in pairs]
+
+        near_duplicates = []
+        if self.detect_near_duplicates:
+            near_duplicates = self._detect_near_duplicates(
+                (chunk_ids[i], contents[i].split()) for i in unique_indices
+            )
 
         for i, chunk in enumerate(chunks):
             # Check required fields
-            required_fields = ["chunk_id", "content", "source_url"]
-            if not self._validate_required_fields(chunk, required_fields):
+            if not self._validate_required_fields(chunk, self.CHUNK_REQUIRED_FIELDS):
                 issues.append(
                     {
                         "type": "missing_fields",
@@ -237,6 +352,8 @@ class DataValidator:
             "issues": issues,
             "duplicate_chunks": chunk_duplicates,
             "duplicate_count": len(chunk_duplicates),
+            "near_duplicates": near_duplicates,
+            "near_duplicate_count": len(near_duplicates),
         }
 
         logger.info(f"Validation complete: {results['valid_chunks']}/{results['total_chunks']} valid")
@@ -256,7 +373,7 @@ class DataValidator:
         logger.info(f"Validating embeddings for {len(chunks_with_embeddings)} chunks")
 
         issues = []
-        embedding_dimensions = set()
+        indices_by_dimension = defaultdict(list)
 
         for i, chunk in enumerate(chunks_with_embeddings):
             # Check for embedding field
@@ -283,28 +400,43 @@ class DataValidator:
                 )
                 continue
 
-            # Check embedding dimension
-            embedding_dimensions.add(len(embedding))
+            # Group by dimension so each group stacks into one matrix
+            indices_by_dimension[len(embedding)].append(i)
 
-            # Check for all-zero embeddings (likely an error)
-            if all(v == 0 for v in embedding):
-                issues.append(
-                    {
-                        "type": "zero_embedding",
-                        "index": i,
-                        "chunk_id": chunk.get("chunk_id"),
-                    }
-                )
+        embedding_dimensions = set(indices_by_dimension)
 
-            # Check for NaN or infinite values
-            if any(v != v or abs(v) == float("inf") for v in embedding):
-                issues.append(
-                    {
-                        "type": "invalid_embedding_values",
-                        "index": i,
-                        "chunk_id": chunk.get("chunk_id"),
-                    }
-                )
+        for indices in indices_by_dimension.values():
+            embeddings = [chunks_with_embeddings[i]["embedding"] for i in indices]
+
+            # All-zero embeddings are likely an error; NaN/Inf values are invalid.
+            # The dtype is not forced, so e.g. numeric strings are not silently
+            # converted to floats and go to the per-vector check instead
+            try:
+                matrix = np.asarray(embeddings)
+            except (TypeError, ValueError):
+                matrix = None
+
+            if matrix is not None and matrix.ndim == 2 and matrix.dtype.kind in "fiub":
+                zero_rows = ~matrix.any(axis=1)
+                invalid_rows = ~np.isfinite(matrix).all(axis=1)
+            else:
+                # Some vector holds non-numeric values; check one vector at a time
+                flags = [self._embedding_value_flags(embedding) for embedding in embeddings]
+                zero_rows = np.array([is_zero for is_zero, _ in flags], dtype=bool)
+                invalid_rows = np.array([is_invalid for _, is_invalid in flags], dtype=bool)
+
+            for row in np.flatnonzero(zero_rows | invalid_rows):
+                i = indices[row]
+                chunk_id = chunks_with_embeddings[i].get("chunk_id")
+                if zero_rows[row]:
+                    issues.append({"type": "zero_embedding", "index": i, "chunk_id": chunk_id})
+                if invalid_rows[row]:
+                    issues.append(
+                        {"type": "invalid_embedding_values", "index": i, "chunk_id": chunk_id}
+                    )
+
+        # Report issues in chunk order
+        issues.sort(key=lambda issue: issue["index"])
 
         # Check dimension consistency
         if len(embedding_dimensions) > 1:
@@ -325,12 +457,32 @@ class DataValidator:
 
         return results
 
-    def validate_metadata(self, chunks: List[Dict]) -> Dict:
+    @staticmethod
+    def _embedding_value_flags(embedding) -> Tuple[bool, bool]:
+        """
+        Check a single embedding for all-zero and non-finite values.
+
+        Uses the C-level any() and map(isfinite, ...) so both checks
+        short-circuit without a Python generator frame per element.
+        Non-numeric values count as invalid.
+
+        Returns:
+            (is_all_zero, has_invalid_values) tuple
+        """
+        is_zero = not any(embedding)
+        try:
+            has_invalid = not all(map(isfinite, embedding))
+        except TypeError:
+            has_invalid = True
+        return is_zero, has_invalid
+
+    def validate_metadata(self, chunks: List[Dict], include_lists: bool = False) -> Dict:
         """
         Validate metadata completeness and accuracy.
 
         Args:
             chunks: List of chunks with metadata
+            include_lists: Also return the full lists of unique sources and AMCs
 
         Returns:
             Validation results dictionary
@@ -379,10 +531,12 @@ class DataValidator:
             "issues": issues,
             "unique_sources": len(urls_found),
             "unique_amcs": len(amcs_found),
-            "sources": list(urls_found),
-            "amcs": list(amcs_found),
         }
 
+        if include_lists:
+            results["sources"] = list(urls_found)
+            results["amcs"] = list(amcs_found)
+
         logger.info(
             f"Validation complete: {results['valid_metadata']}/{results['total_chunks']} valid"
         )
@@ -391,12 +545,14 @@ class DataValidator:
 
         return results
 
-    def validate_source_urls(self, chunks: List[Dict]) -> Dict:
+    def validate_source_urls(self, chunks: List[Dict], include_lists: bool = False) -> Dict:
         """
         Validate that source URLs are correctly stored and accessible.
 
         Args:
             chunks: List of chunks with source URLs
+            include_lists: Return the full URL distribution instead of only
+                the most common URLs
 
         Returns:
             Validation results dictionary
@@ -404,7 +560,11 @@ class DataValidator:
         logger.info(f"Validating source URLs for {len(chunks)} chunks")
 
         issues = []
-        url_stats = defaultdict(int)
+        urls = [chunk["source_url"] for chunk in chunks if chunk.get("source_url")]
+        url_stats = Counter(urls)
+
+        # Validate each distinct URL once
+        invalid_urls = {url for url in url_stats if not self._validate_url(url)}
 
         for i, chunk in enumerate(chunks):
             source_url = chunk.get("source_url")
@@ -417,10 +577,7 @@ class DataValidator:
                         "chunk_id": chunk.get("chunk_id"),
                     }
                 )
-                continue
-
-            # Validate URL format
-            if not self._validate_url(source_url):
+            elif source_url in invalid_urls:
                 issues.append(
                     {
                         "type": "invalid_url_format",
@@ -430,15 +587,14 @@ class DataValidator:
                     }
                 )
 
-            # Track URL frequency
-            url_stats[source_url] += 1
-
         results = {
             "total_chunks": len(chunks),
             "valid_urls": len(chunks) - len(issues),
             "issues": issues,
             "unique_urls": len(url_stats),
-            "url_distribution": dict(url_stats),
+            "url_distribution": (
+                dict(url_stats) if include_lists else dict(url_stats.most_common(self.TOP_URLS))
+            ),
         }
 
         logger.info(f"Validation complete: {results['valid_urls']}/{results['total_chunks']} valid")
@@ -511,27 +667,17 @@ class DataValidator:
 
         return results
 
-    def _validate_required_fields(self, item: Dict, required_fields: List[str]) -> bool:
+    def _validate_required_fields(self, item: Dict, required_fields: Iterable[str]) -> bool:
         """Check if all required fields are present."""
-        return all(field in item for field in required_fields)
+        # frozenset() returns the class constants as-is, so this is one subset check
+        return frozenset(required_fields) <= item.keys()
 
     def _validate_url(self, url: str) -> bool:
         """Validate URL format."""
         if not url or not isinstance(url, str):
             return False
 
-        # Basic URL validation
-        url_pattern = re.compile(
-            r"^https?://"  # http:// or https://
-            r"(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|"  # domain
-            r"localhost|"  # localhost
-            r"\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})"  # IP
-            r"(?::\d+)?"  # optional port
-            r"(?:/?|[/?]\S+)$",
-            re.IGNORECASE,
-        )
-
-        return bool(url_pattern.match(url))
+        return _is_valid_url(url)
 
     def _validate_content_length(self, content: str) -> bool:
         """Validate content length."""
@@ -541,8 +687,25 @@ class DataValidator:
         length = len(content)
         return self.min_content_length <= length <= self.max_content_length
 
-    def _is_low_quality_content(self, content: str) -> bool:
-        """Check if content is low quality."""
+    def _prepare_content(self, content: str) -> Tuple[List[str], int]:
+        """
+        Split content into words and hash it in one step.
+
+        The word list is shared by the quality, hashing and near-duplicate
+        checks so each document is only split once. Joining the words and
+        lowercasing gives the same normalized form _hash_content uses.
+
+        Args:
+            content: Content string
+
+        Returns:
+            (words, content_hash) tuple
+        """
+        words = content.split()
+        return words, _hash_normalized(" ".join(words).lower())
+
+    def _is_low_quality_content(self, content: str, words: Optional[List[str]] = None) -> bool:
+        """Check if content is low quality, optionally reusing its split words."""
         if not content:
             return True
 
@@ -550,14 +713,19 @@ class DataValidator:
         if len(content.strip()) < len(content) * 0.5:
             return True
 
-        # Check for very repetitive content
-        words = content.split()
-        if len(words) > 0:
-            unique_words = set(words)
-            if len(unique_words) / len(words) < 0.3:
-                return True
+        # Check for very repetitive content (fewer than 30% unique words).
+        # Words are added to the set in blocks so typical, non-repetitive
+        # content stops early instead of hashing every word.
+        if words is None:
+            words = content.split()
+        min_unique = 0.3 * len(words)
+        unique_words = set()
+        for start in range(0, len(words), self.UNIQUE_WORDS_BLOCK):
+            unique_words.update(words[start : start + self.UNIQUE_WORDS_BLOCK])
+            if len(unique_words) >= min_unique:
+                return False
 
-        return False
+        return len(words) > 0
 
     def _detect_duplicates(self, documents: List[Dict]) -> List[Tuple[int, int]]:
         """
@@ -569,18 +737,7 @@ class DataValidator:
         Returns:
             List of (index1, index2) tuples for duplicate pairs
         """
-        duplicates = []
-        content_hashes = {}
-
-        for i, doc in enumerate(documents):
-            content = doc.get("content", "")
-            content_hash = self._compute_content_hash(content)
-
-            if content_hash in content_hashes:
-                duplicates.append((content_hashes[content_hash], i))
-            else:
-                content_hashes[content_hash] = i
-
+        duplicates, _ = self._find_exact_duplicates([doc.get("content", "") for doc in documents])
         return duplicates
 
     def _detect_duplicate_chunks(self, chunks: List[Dict]) -> List[Tuple[str, str]]:
@@ -593,29 +750,106 @@ class DataValidator:
         Returns:
             List of (chunk_id1, chunk_id2) tuples for duplicate pairs
         """
+        pairs, _ = self._find_exact_duplicates([chunk.get("content", "") for chunk in chunks])
+        chunk_ids = [chunk.get("chunk_id", "") for chunk in chunks]
+        return [(chunk_ids[first], chunk_ids[i]) for first, i in pairs]
+
+    def _find_exact_duplicates(
+        self, contents: List[str]
+    ) -> Tuple[List[Tuple[int, int]], List[int]]:
+        """
+        Pair up exact duplicates by content hash.
+
+        Args:
+            contents: List of content strings
+
+        Returns:
+            Tuple of (index1, index2) duplicate pairs and the indices of
+            first-seen (unique) contents
+        """
         duplicates = []
         content_hashes = {}
+        unique_indices = []
 
-        for chunk in chunks:
-            content = chunk.get("content", "")
-            chunk_id = chunk.get("chunk_id", "")
-            content_hash = self._compute_content_hash(content)
+        for i, content_hash in enumerate(self._compute_content_hashes(contents)):
+            # One dict probe: setdefault returns the first index seen for the hash
+            first = content_hashes.setdefault(content_hash, i)
+            if first != i:
+                duplicates.append((first, i))
+            else:
+                unique_indices.append(i)
+
+        return duplicates, unique_indices
 
-            if content_hash in content_hashes:
-                duplicates.append((content_hashes[content_hash], chunk_id))
+    def _detect_near_duplicates(self, items: Iterable[Tuple]) -> List[Tuple]:
+        """
+        Detect near-duplicate content using MinHash LSH over word shingles.
+
+        Exact duplicates are expected to be filtered out beforehand by
+        content hashing; this pass catches paraphrases and re-rendered
+        boilerplate. LSH only proposes candidates, so each candidate pair is
+        confirmed by the exact Jaccard similarity of the shingle sets and
+        kept if it is at least ``duplicate_threshold``. Returns no pairs if
+        datasketch is not installed.
+
+        Args:
+            items: Iterable of (key, words) tuples, where words is the
+                content split on whitespace; only consumed if datasketch is
+                installed
+
+        Returns:
+            List of (key1, key2) tuples for near-duplicate pairs
+        """
+        if not DATASKETCH_AVAILABLE:
+            return []
+
+        lsh = MinHashLSH(threshold=self.duplicate_threshold, num_perm=self.MINHASH_NUM_PERM)
+        duplicates = []
+        keys = []
+        shingle_sets = []
+
+        for position, (key, words) in enumerate(items):
+            keys.append(key)
+            size = self.SHINGLE_SIZE
+            if len(words) > size:
+                shingles = {
+                    " ".join(words[j : j + size]).lower() for j in range(len(words) - size + 1)
+                }
             else:
-                content_hashes[content_hash] = chunk_id
+                shingles = {" ".join(words).lower()}
+
+            minhash = MinHash(num_perm=self.MINHASH_NUM_PERM)
+            minhash.update_batch([shingle.encode() for shingle in shingles])
+
+            for candidate in sorted(lsh.query(minhash)):
+                other = shingle_sets[candidate]
+                overlap = len(shingles & other)
+                if overlap >= self.duplicate_threshold * (len(shingles) + len(other) - overlap):
+                    duplicates.append((keys[candidate], key))
+            lsh.insert(position, minhash)
+            shingle_sets.append(shingles)
 
         return duplicates
 
-    def _compute_content_hash(self, content: str) -> str:
+    def _compute_content_hash(self, content: str) -> int:
         """Compute hash of content for duplicate detection."""
-        # Normalize content
-        normalized = content.lower().strip()
-        normalized = re.sub(r"\s+", " ", normalized)
+        return _hash_content(content)
+
+    def _compute_content_hashes(self, contents: List[str]) -> List[int]:
+        """
+        Compute content hashes for a batch of contents.
+
+        Hashing stays in-process: worker start-up (which re-imports the
+        calling script and its dependencies) costs more than hashing even
+        tens of thousands of chunks.
 
-        # Compute hash
-        return hashlib.md5(normalized.encode()).hexdigest()
+        Args:
+            contents: List of content strings
+
+        Returns:
+            List of content hashes, in input order
+        """
+        return [_hash_content(content) for content in contents]
 
     def run_full_validation(
         self,
@@ -662,23 +896,13 @@ class DataValidator:
 
 def main():
     """Main function for testing validator."""
-    import json
-
     validator = DataValidator()
 
     # Load data
     try:
-        with open("data/scraped_content.json", "r", encoding="utf-8") as f:
-            data = json.load(f)
-            scraped_data = data.get("scraped_content", [])
-
-        with open("data/processed_content.json", "r", encoding="utf-8") as f:
-            data = json.load(f)
-            processed_docs = data.get("processed_documents", [])
-
-        with open("data/chunks_with_embeddings.json", "r", encoding="utf-8") as f:
-            data = json.load(f)
-            chunks = data.get("chunks", [])
+        scraped_data = load_json_records("data/scraped_content.json", "scraped_content")
+        processed_docs = load_json_records("data/processed_content.json", "processed_documents")
+        chunks = load_json_records("data/chunks_with_embeddings.json", "chunks")
 
         # Run full validation
         results = validator.run_full_validation(
@@ -700,6 +924,8 @@ def main():
                 print(f"  Issues found: {len(stage_results['issues'])}")
             if "duplicate_count" in stage_results:
                 print(f"  Duplicates found: {stage_results['duplicate_count']}")
+            if "near_duplicate_count" in stage_results:
+                print(f"  Near-duplicates found: {stage_results['near_duplicate_count']}")
 
     except FileNotFoundError as e:
         logger.error(f"Data file not found: {e}")
@@ -2,13 +2,15 @@
 Unit tests for the validator module
 """
 
+import copy
+
 import pytest
-from validator import DataValidator
+from validator import DataValidator, DATASKETCH_AVAILABLE
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def validator():
-    """Create a data validator."""
+    """Create a data validator shared by all tests in this module."""
     return DataValidator(
         min_content_length=50,
         max_content_length=100000,
@@ -16,6 +18,14 @@ def validator():
     )
 
 
+@pytest.fixture(autouse=True)
+def reset_validation_results(validator):
+    """Restore the shared validator's results after each test."""
+    initial_results = copy.deepcopy(validator.validation_results)
+    yield
+    validator.validation_results = initial_results
+
+
 def test_validator_initialization(validator):
     """Test validator initialization."""
     assert validator.min_content_length == 50
@@ -23,52 +33,67 @@ def test_validator_initialization(validator):
     assert validator.duplicate_threshold == 0.9
 
 
-def test_validate_required_fields(validator):
+@pytest.mark.parametrize(
+    "item,expected",
+    [
+        ({"url": "https://example.com", "content": "Test"}, True),
+        ({"url": "https://example.com"}, False),
+    ],
+)
+def test_validate_required_fields(validator, item, expected):
     """Test required fields validation."""
-    item = {"url": "https://example.com", "content": "Test"}
-    assert validator._validate_required_fields(item, ["url", "content"]) is True
-
-    item = {"url": "https://example.com"}
-    assert validator._validate_required_fields(item, ["url", "content"]) is False
-
-
-def test_validate_url(validator):
+    assert validator._validate_required_fields(item, ["url", "content"]) is expected
+
+
+@pytest.mark.parametrize(
+    "url,expected",
+    [
+        # Valid URLs
+        ("https://example.com", True),
+        ("http://groww.in/mutual-funds", True),
+        # Invalid URLs
+        ("not-a-url", False),
+        ("", False),
+        (None, False),
+    ],
+)
+def test_validate_url(validator, url, expected):
     """Test URL validation."""
-    # Valid URLs
-    assert validator._validate_url("https://example.com") is True
-    assert validator._validate_url("http://groww.in/mutual-funds") is True
-
-    # Invalid URLs
-    assert validator._validate_url("not-a-url") is False
-    assert validator._validate_url("") is False
-    assert validator._validate_url(None) is False
-
-
-def test_validate_content_length(validator):
+    assert validator._validate_url(url) is expected
+
+
+@pytest.mark.parametrize(
+    "content,expected",
+    [
+        # Valid content
+        ("a" * 100, True),
+        # Too short
+        ("short", False),
+        # Too long
+        ("a" * 200000, False),
+    ],
+)
+def test_validate_content_length(validator, content, expected):
     """Test content length validation."""
-    # Valid content
-    assert validator._validate_content_length("a" * 100) is True
-
-    # Too short
-    assert validator._validate_content_length("short") is False
-
-    # Too long
-    assert validator._validate_content_length("a" * 200000) is False
-
-
-def test_is_low_quality_content(validator):
+    assert validator._validate_content_length(content) is expected
+
+
+@pytest.mark.parametrize(
+    "content,expected",
+    [
+        # Good quality
+        ("This is good quality content with variety", False),
+        # Empty
+        ("", True),
+        # Mostly whitespace
+        ("   \n\n   \n  ", True),
+        # Very repetitive
+        ("test " * 100, True),
+    ],
+)
+def test_is_low_quality_content(validator, content, expected):
     """Test low quality content detection."""
-    # Good quality
-    assert validator._is_low_quality_content("This is good quality content with variety") is False
-
-    # Empty
-    assert validator._is_low_quality_content("") is True
-
-    # Mostly whitespace
-    assert validator._is_low_quality_content("   \n\n   \n  ") is True
-
-    # Very repetitive
-    assert validator._is_low_quality_content("test " * 100) is True
+    assert validator._is_low_quality_content(content) is expected
 
 
 def test_compute_content_hash(validator):
@@ -88,6 +113,16 @@ def test_compute_content_hash(validator):
     assert hash1 != hash3
 
 
+def test_compute_content_hashes_large_batch(validator):
+    """Test batch hashing of a large batch matches per-item hashing."""
+    contents = [f"Chunk content {i % 3000}" for i in range(6000)]
+
+    hashes = validator._compute_content_hashes(contents)
+
+    assert hashes == [validator._compute_content_hash(content) for content in contents]
+    assert len(set(hashes)) == 3000
+
+
 def test_detect_duplicates(validator):
     """Test duplicate detection."""
     documents = [
@@ -102,6 +137,62 @@ def test_detect_duplicates(validator):
     assert duplicates[0] == (0, 2)
 
 
+NEAR_DUPLICATE_CONTENT = (
+    "The HDFC Equity Fund has an expense ratio of 1.5 percent and a minimum SIP "
+    "of 500 rupees per month with an exit load of 1 percent within one year. "
+    "The fund invests primarily in large cap companies across sectors such as "
+    "banking, technology, energy and consumer goods, and is benchmarked against "
+    "the NIFTY 500 total return index with a very high riskometer rating"
+)
+
+
+@pytest.mark.skipif(not DATASKETCH_AVAILABLE, reason="datasketch not installed")
+def test_detect_near_duplicates():
+    """Test near-duplicate detection with MinHash LSH."""
+    validator = DataValidator(duplicate_threshold=0.9, detect_near_duplicates=True)
+    scraped_data = [
+        {"url": "https://example.com/1", "content": NEAR_DUPLICATE_CONTENT},
+        {"url": "https://example.com/2", "content": NEAR_DUPLICATE_CONTENT + " today"},
+        {"url": "https://example.com/3", "content": "SBI Bluechip Fund NAV history and returns"},
+    ]
+
+    results = validator.validate_scraped_data(scraped_data)
+
+    assert results["duplicates"] == []
+    assert results["near_duplicates"] == [(0, 1)]
+    assert results["near_duplicate_count"] == 1
+
+
+@pytest.mark.skipif(not DATASKETCH_AVAILABLE, reason="datasketch not installed")
+def test_near_duplicates_below_threshold_not_reported():
+    """Test LSH candidates are confirmed against the similarity threshold."""
+    validator = DataValidator(duplicate_threshold=0.9, detect_near_duplicates=True)
+    # An LSH candidate whose shingle Jaccard similarity is only ~0.85
+    edited = NEAR_DUPLICATE_CONTENT.replace("exit load", "exit fee")
+    chunks = [
+        {"chunk_id": "chunk-1", "content": NEAR_DUPLICATE_CONTENT, "source_url": "a"},
+        {"chunk_id": "chunk-2", "content": edited, "source_url": "b"},
+    ]
+
+    results = validator.validate_chunks(chunks)
+
+    assert results["duplicate_chunks"] == []
+    assert results["near_duplicates"] == []
+
+
+def test_near_duplicates_off_by_default(validator):
+    """Test near-duplicate detection is opt-in."""
+    scraped_data = [
+        {"url": "https://example.com/1", "content": NEAR_DUPLICATE_CONTENT},
+        {"url": "https://example.com/2", "content": NEAR_DUPLICATE_CONTENT + " today"},
+    ]
+
+    results = validator.validate_scraped_data(scraped_data)
+
+    assert validator.detect_near_duplicates is False
+    assert results["near_duplicates"] == []
+
+
 def test_validate_scraped_data(validator):
     """Test scraped data validation."""
     scraped_data = [
@@ -190,6 +281,27 @@ def test_validate_embeddings(validator):
     assert len(results["issues"]) >= 2
 
 
+@pytest.mark.parametrize(
+    "bad_embedding",
+    [
+        [0.1, None, 0.3],
+        ["0.1", "0.2", "0.3"],
+    ],
+)
+def test_validate_embeddings_non_numeric_values(validator, bad_embedding):
+    """Test that non-numeric embedding values are reported instead of raising."""
+    chunks_with_embeddings = [
+        {"chunk_id": "chunk-1", "embedding": [0.1, 0.2, 0.3]},
+        {"chunk_id": "chunk-2", "embedding": bad_embedding},
+    ]
+
+    results = validator.validate_embeddings(chunks_with_embeddings)
+
+    assert results["issues"] == [
+        {"type": "invalid_embedding_values", "index": 1, "chunk_id": "chunk-2"}
+    ]
+
+
 def test_validate_metadata(validator):
     """Test metadata validation."""
     chunks = [
@@ -221,6 +333,23 @@ def test_validate_metadata(validator):
     assert len(results["issues"]) > 0
 
 
+def test_validate_metadata_include_lists(validator):
+    """Test that unique source and AMC lists are only returned on request."""
+    chunks = [
+        {
+            "chunk_id": "chunk-1",
+            "source_url": "https://example.com",
+            "metadata": {"amc_name": "Test AMC"},
+        },
+    ]
+
+    assert "sources" not in validator.validate_metadata(chunks)
+
+    results = validator.validate_metadata(chunks, include_lists=True)
+    assert results["sources"] == ["https://example.com"]
+    assert results["amcs"] == ["Test AMC"]
+
+
 def test_validate_source_urls(validator):
     """Test source URLs validation."""
     chunks = [
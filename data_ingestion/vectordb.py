@@ -8,20 +8,51 @@ and retrieving document chunks with embeddings.
 import logging
 import chromadb
 from chromadb.config import Settings
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Sequence, Set, Tuple
+import hashlib
+from collections import defaultdict
 import json
 import os
 
+import numpy as np
+
+from json_records import iter_json_records
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def _dumps_json(value: Any) -> str:
+    """
+    Serialize a value to a JSON string.
+
+    Uses orjson when available and falls back to the stdlib encoder for
+    values orjson rejects (e.g. dicts with non-string keys).
+    """
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(value).decode("utf-8")
+        except TypeError:
+            pass
+    return json.dumps(value)
+
+
 class VectorDatabase:
     """
     Manages ChromaDB vector database operations.
     """
 
+    # Chunks sent to ChromaDB per add() call when the client does not
+    # report its maximum batch size
+    BATCH_SIZE = 100
+
     def __init__(
         self,
         persist_directory: str = "./data/vectordb",
@@ -54,6 +85,9 @@ class VectorDatabase:
         self.collection = self._get_or_create_collection()
         logger.info(f"Collection '{collection_name}' ready")
 
+        # Larger add() calls mean fewer round trips into the storage layer
+        self.batch_size = self._get_max_batch_size()
+
     def _get_or_create_collection(self):
         """
         Get existing collection or create a new one.
@@ -78,62 +112,252 @@ class VectorDatabase:
 
         return collection
 
-    def add_chunks(self, chunks: List[Dict]) -> None:
+    def _get_max_batch_size(self) -> int:
+        """
+        Get the largest batch the ChromaDB client accepts in a single add().
+
+        Returns:
+            Maximum batch size, or BATCH_SIZE if the client does not report one
+        """
+        try:
+            return max(int(self.client.get_max_batch_size()), 1)
+        except Exception:
+            return self.BATCH_SIZE
+
+    def add_chunks(
+        self,
+        chunks: List[Dict],
+        skip_duplicates: bool = False,
+        batch_size: Optional[int] = None,
+    ) -> Dict[str, int]:
         """
         Add chunks with embeddings to the vector database.
 
         Args:
             chunks: List of chunk dictionaries with content, embeddings, and metadata
+            skip_duplicates: Skip chunks whose content is already stored for the
+                same source URL, in the collection or earlier in ``chunks``.
+                Identical content from different sources is always kept
+            batch_size: Chunks per collection.add() call (defaults to, and is
+                capped at, the client's maximum batch size)
+
+        Returns:
+            Count of chunks added, and the count and IDs of chunks skipped as
+            duplicates ("added", "skipped_duplicates", "skipped_ids")
         """
         logger.info(f"Adding {len(chunks)} chunks to vector database")
 
-        # Prepare data for ChromaDB
-        ids = []
-        embeddings = []
-        documents = []
-        metadatas = []
+        batch_size = min(batch_size or self.batch_size, self.batch_size)
+
+        # Per-batch buffers, flushed to ChromaDB whenever they fill up
+        batch_ids = []
+        batch_embeddings = []
+        batch_documents = []
+        batch_metadatas = []
+        batch_number = 0
+        seen_keys = set()
+        embedding_dim = None
+        added = 0
+        skipped_ids = []
 
         for i, chunk in enumerate(chunks):
             try:
                 # Prepare ID
                 chunk_id = chunk.get("chunk_id", f"chunk-{i}")
-                ids.append(chunk_id)
 
                 # Prepare embedding
                 embedding = chunk.get("embedding")
                 if embedding is None:
                     logger.warning(f"Chunk {chunk_id} missing embedding, skipping")
                     continue
-                embeddings.append(embedding)
 
-                # Prepare document text
-                content = chunk.get("content", "")
-                documents.append(content)
+                # A wrong-dimension embedding would make the whole batch fail,
+                # so check each one against the first chunk's dimension
+                if embedding_dim is None:
+                    embedding_dim = len(embedding)
+                elif len(embedding) != embedding_dim:
+                    logger.warning(
+                        f"Chunk {chunk_id} embedding has dimension {len(embedding)}, "
+                        f"expected {embedding_dim}, skipping"
+                    )
+                    continue
 
                 # Prepare metadata (ChromaDB requires string or numeric values)
                 metadata = self._prepare_metadata(chunk)
-                metadatas.append(metadata)
+
+                content_key = self._content_key(metadata)
+                if skip_duplicates and content_key is not None:
+                    if content_key in seen_keys:
+                        logger.debug(f"Chunk {chunk_id} duplicates earlier content, skipping")
+                        skipped_ids.append(chunk_id)
+                        continue
+                    seen_keys.add(content_key)
+
+                batch_ids.append(chunk_id)
+                batch_embeddings.append(embedding)
+                batch_documents.append(chunk.get("content", ""))
+                batch_metadatas.append(metadata)
 
             except Exception as e:
                 logger.error(f"Error preparing chunk {i}: {e}")
                 continue
 
-        # Add to collection in batches
-        batch_size = 100
-        for i in range(0, len(ids), batch_size):
-            end_idx = min(i + batch_size, len(ids))
-            try:
-                self.collection.add(
-                    ids=ids[i:end_idx],
-                    embeddings=embeddings[i:end_idx],
-                    documents=documents[i:end_idx],
-                    metadatas=metadatas[i:end_idx],
+            if len(batch_ids) == batch_size:
+                batch_number += 1
+                batch_added, batch_skipped = self._add_batch(
+                    batch_number,
+                    batch_ids,
+                    batch_embeddings,
+                    batch_documents,
+                    batch_metadatas,
+                    skip_existing=skip_duplicates,
                 )
-                logger.debug(f"Added batch {i // batch_size + 1}")
-            except Exception as e:
-                logger.error(f"Error adding batch {i // batch_size + 1}: {e}")
+                added += batch_added
+                skipped_ids.extend(batch_skipped)
+                batch_ids.clear()
+                batch_embeddings.clear()
+                batch_documents.clear()
+                batch_metadatas.clear()
+
+        # Flush the final partial batch
+        if batch_ids:
+            batch_number += 1
+            batch_added, batch_skipped = self._add_batch(
+                batch_number,
+                batch_ids,
+                batch_embeddings,
+                batch_documents,
+                batch_metadatas,
+                skip_existing=skip_duplicates,
+            )
+            added += batch_added
+            skipped_ids.extend(batch_skipped)
+
+        logger.info(f"Successfully added {added} chunks to database")
+        skipped_duplicates = len(skipped_ids)
+        if skipped_duplicates:
+            logger.info(
+                f"Skipped {skipped_duplicates} duplicate chunks "
+                f"({skipped_duplicates / len(chunks):.1%} of input)"
+            )
+
+        return {
+            "added": added,
+            "skipped_duplicates": skipped_duplicates,
+            "skipped_ids": skipped_ids,
+        }
 
-        logger.info(f"Successfully added chunks to database")
+    def _add_batch(
+        self,
+        batch_number: int,
+        ids: List[str],
+        embeddings: List[List[float]],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        skip_existing: bool = False,
+    ) -> Tuple[int, List[str]]:
+        """
+        Add a single batch of prepared chunks to the collection.
+
+        Args:
+            batch_number: 1-based batch number, used for logging
+            ids: Chunk IDs
+            embeddings: Embedding vectors
+            documents: Chunk texts
+            metadatas: Prepared metadata dictionaries
+            skip_existing: Drop chunks whose (source URL, content hash) pair is
+                already stored. Chunks stored under a different ID are reported
+                as skipped; ones already stored under their own ID are not
+
+        Returns:
+            (added, skipped_ids) tuple; added is 0 if the write failed
+        """
+        skipped_ids = []
+        if skip_existing:
+            existing = self._existing_content_keys(
+                [metadata.get("content_sha256") for metadata in metadatas]
+            )
+            if existing:
+                keep = []
+                for j, metadata in enumerate(metadatas):
+                    stored_ids = existing.get(self._content_key(metadata))
+                    if stored_ids is None:
+                        keep.append(j)
+                    elif ids[j] not in stored_ids:
+                        skipped_ids.append(ids[j])
+                logger.info(
+                    f"Batch {batch_number}: skipping {len(ids) - len(keep)} chunks already stored"
+                )
+                if not keep:
+                    return 0, skipped_ids
+                ids = [ids[j] for j in keep]
+                embeddings = [embeddings[j] for j in keep]
+                documents = [documents[j] for j in keep]
+                metadatas = [metadatas[j] for j in keep]
+
+        try:
+            self.collection.add(
+                ids=ids,
+                # One contiguous float32 matrix instead of a list of Python float lists
+                embeddings=np.asarray(embeddings, dtype=np.float32),
+                documents=documents,
+                metadatas=metadatas,
+            )
+            logger.debug(f"Added batch {batch_number}")
+        except Exception as e:
+            logger.error(f"Error adding batch {batch_number}: {e}")
+            return 0, skipped_ids
+
+        return len(ids), skipped_ids
+
+    @staticmethod
+    def _content_key(metadata: Dict[str, Any]) -> Optional[Tuple[Optional[str], str]]:
+        """
+        Build the duplicate-detection key for prepared chunk metadata.
+
+        Content is only treated as a duplicate within the same source URL, so
+        identical text from another page or AMC is still stored and found by
+        metadata filters.
+
+        Returns:
+            (source_url, content_sha256) tuple, or None if there is no content hash
+        """
+        content_hash = metadata.get("content_sha256")
+        if content_hash is None:
+            return None
+        return metadata.get("source_url"), content_hash
+
+    def _existing_content_keys(
+        self, content_hashes: List[Optional[str]]
+    ) -> Dict[Tuple[Optional[str], str], Set[str]]:
+        """
+        Find which (source URL, content hash) pairs are already stored.
+
+        Args:
+            content_hashes: SHA-256 hex digests to look up (None entries are ignored)
+
+        Returns:
+            Mapping of each stored (source_url, content_sha256) key to the
+            chunk IDs it is stored under
+        """
+        lookup = list({h for h in content_hashes if h is not None})
+        if not lookup:
+            return {}
+
+        try:
+            results = self.collection.get(
+                where={"content_sha256": {"$in": lookup}},
+                include=["metadatas"],
+            )
+        except Exception as e:
+            logger.error(f"Error looking up existing content hashes: {e}")
+            return {}
+
+        existing = defaultdict(set)
+        for chunk_id, metadata in zip(results.get("ids") or [], results.get("metadatas") or []):
+            if metadata:
+                existing[self._content_key(metadata)].add(chunk_id)
+        return existing
 
     def _prepare_metadata(self, chunk: Dict) -> Dict[str, Any]:
         """
@@ -155,9 +379,12 @@ class VectorDatabase:
         if "chunk_index" in chunk:
             metadata["chunk_index"] = int(chunk["chunk_index"])
 
-        # Content length
+        # Content length and hash (the hash is used to skip duplicate content)
         if "content" in chunk:
             metadata["content_length"] = len(chunk["content"])
+            metadata["content_sha256"] = hashlib.sha256(
+                chunk["content"].encode("utf-8")
+            ).hexdigest()
 
         # AMC information from nested metadata
         chunk_metadata = chunk.get("metadata", {})
@@ -173,7 +400,7 @@ class VectorDatabase:
             structured_info = chunk_metadata["structured_info"]
             if structured_info:
                 # Store as JSON string
-                metadata["structured_info_json"] = json.dumps(structured_info)
+                metadata["structured_info_json"] = _dumps_json(structured_info)
 
                 # Also store individual fields
                 for key, value in structured_info.items():
@@ -226,18 +453,23 @@ class VectorDatabase:
             logger.error(f"Error querying database: {e}")
             raise
 
-    def get_by_id(self, chunk_ids: List[str]) -> Dict:
+    def get_by_id(
+        self,
+        chunk_ids: List[str],
+        include: Sequence[str] = ("documents", "metadatas"),
+    ) -> Dict:
         """
         Get chunks by their IDs.
 
         Args:
             chunk_ids: List of chunk IDs
+            include: Fields to return; add "embeddings" to also fetch the vectors
 
         Returns:
             Retrieved chunks
         """
         try:
-            results = self.collection.get(ids=chunk_ids, include=["documents", "metadatas", "embeddings"])
+            results = self.collection.get(ids=chunk_ids, include=list(include))
             return results
         except Exception as e:
             logger.error(f"Error retrieving chunks: {e}")
@@ -325,25 +557,26 @@ class VectorDatabase:
 
 def main():
     """Main function for testing vector database."""
-    import json
-
     # Initialize vector database
     vectordb = VectorDatabase(
         persist_directory="./data/vectordb",
         collection_name="mutual_funds_faq",
     )
 
-    # Load chunks with embeddings
+    # Stream chunks with embeddings into the database one batch at a time
+    batch = []
     try:
-        with open("data/chunks_with_embeddings.json", "r", encoding="utf-8") as f:
-            data = json.load(f)
-            chunks = data.get("chunks", [])
+        for chunk in iter_json_records("data/chunks_with_embeddings.json", "chunks"):
+            batch.append(chunk)
+            if len(batch) == vectordb.batch_size:
+                vectordb.add_chunks(batch)
+                batch = []
     except FileNotFoundError:
         logger.error("Chunks with embeddings file not found. Run embedder first.")
         return
 
-    # Add chunks to database
-    vectordb.add_chunks(chunks)
+    if batch:
+        vectordb.add_chunks(batch)
 
     # Get collection info
     info = vectordb.get_collection_info()
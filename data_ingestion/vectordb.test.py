@@ -3,35 +3,41 @@ Unit tests for the vectordb module
 """
 
 import pytest
+import json
 import os
-import shutil
+import numpy as np
 from vectordb import VectorDatabase
 
 
-# Test database directory
-TEST_DB_DIR = "./test_vectordb"
+# Dimension of the dummy embeddings (matches all-MiniLM-L6-v2)
+EMBEDDING_DIM = 384
 
 
-@pytest.fixture
-def vectordb():
-    """Create a test vector database."""
-    # Clean up any existing test database
-    if os.path.exists(TEST_DB_DIR):
-        shutil.rmtree(TEST_DB_DIR)
+def make_embedding(value: float) -> np.ndarray:
+    """Create a dummy float32 embedding with every component set to value."""
+    return np.full(EMBEDDING_DIM, value, dtype=np.float32)
+
 
-    # Create test database
-    db = VectorDatabase(persist_directory=TEST_DB_DIR, collection_name="test_collection")
+@pytest.fixture(scope="module")
+def module_vectordb(tmp_path_factory):
+    """Create one test vector database shared by the tests in this module."""
+    # A fresh directory per pytest-xdist worker, so workers never share a SQLite
+    # file; pytest prunes old temporary directories itself
+    db_dir = tmp_path_factory.mktemp("vectordb")
 
-    yield db
+    return VectorDatabase(persist_directory=str(db_dir), collection_name="test_collection")
 
-    # Cleanup after tests
-    if os.path.exists(TEST_DB_DIR):
-        shutil.rmtree(TEST_DB_DIR)
+
+@pytest.fixture
+def vectordb(module_vectordb):
+    """Provide the shared test database with an empty collection."""
+    module_vectordb.reset()
+    return module_vectordb
 
 
 def test_vectordb_initialization(vectordb):
     """Test vector database initialization."""
-    assert vectordb.persist_directory == TEST_DB_DIR
+    assert os.path.isdir(vectordb.persist_directory)
     assert vectordb.collection_name == "test_collection"
     assert vectordb.collection is not None
 
@@ -42,7 +48,7 @@ def test_add_chunks(vectordb):
         {
             "chunk_id": "test-1",
             "content": "This is a test chunk about expense ratio",
-            "embedding": [0.1] * 384,  # Dummy embedding
+            "embedding": make_embedding(0.1),
             "source_url": "https://example.com/1",
             "chunk_index": 0,
             "metadata": {
@@ -53,7 +59,7 @@ def test_add_chunks(vectordb):
         {
             "chunk_id": "test-2",
             "content": "This is another test chunk about minimum SIP",
-            "embedding": [0.2] * 384,
+            "embedding": [0.2] * EMBEDDING_DIM,  # Plain list, as loaded from JSON
             "source_url": "https://example.com/2",
             "chunk_index": 1,
             "metadata": {
@@ -77,7 +83,7 @@ def test_query_by_text(vectordb):
         {
             "chunk_id": "test-1",
             "content": "The expense ratio of the fund is 1.5%",
-            "embedding": [0.1] * 384,
+            "embedding": make_embedding(0.1),
             "source_url": "https://example.com/1",
             "chunk_index": 0,
             "metadata": {"amc_name": "Test AMC"},
@@ -95,12 +101,12 @@ def test_query_by_text(vectordb):
 def test_query_by_embedding(vectordb):
     """Test querying by embedding."""
     # Add test data
-    query_embedding = [0.15] * 384
+    query_embedding = [0.15] * EMBEDDING_DIM
     chunks = [
         {
             "chunk_id": "test-1",
             "content": "Test content",
-            "embedding": [0.1] * 384,
+            "embedding": make_embedding(0.1),
             "source_url": "https://example.com/1",
             "chunk_index": 0,
             "metadata": {"amc_name": "Test AMC"},
@@ -125,7 +131,7 @@ def test_get_by_id(vectordb):
         {
             "chunk_id": "test-123",
             "content": "Test content",
-            "embedding": [0.1] * 384,
+            "embedding": make_embedding(0.1),
             "source_url": "https://example.com/1",
             "chunk_index": 0,
             "metadata": {"amc_name": "Test AMC"},
@@ -139,6 +145,13 @@ def test_get_by_id(vectordb):
     assert "documents" in results
     assert len(results["documents"]) == 1
     assert results["documents"][0] == "Test content"
+    assert results["embeddings"] is None
+
+    # Embeddings are only fetched on request
+    results = vectordb.get_by_id(["test-123"], include=["documents", "embeddings"])
+
+    assert len(results["embeddings"]) == 1
+    assert len(results["embeddings"][0]) == EMBEDDING_DIM
 
 
 def test_filter_by_metadata(vectordb):
@@ -147,7 +160,7 @@ def test_filter_by_metadata(vectordb):
         {
             "chunk_id": "test-1",
             "content": "HDFC fund content",
-            "embedding": [0.1] * 384,
+            "embedding": make_embedding(0.1),
             "source_url": "https://example.com/1",
             "chunk_index": 0,
             "metadata": {"amc_name": "HDFC"},
@@ -155,7 +168,7 @@ def test_filter_by_metadata(vectordb):
         {
             "chunk_id": "test-2",
             "content": "SBI fund content",
-            "embedding": [0.2] * 384,
+            "embedding": make_embedding(0.2),
             "source_url": "https://example.com/2",
             "chunk_index": 0,
             "metadata": {"amc_name": "SBI"},
@@ -181,7 +194,7 @@ def test_count(vectordb):
         {
             "chunk_id": f"test-{i}",
             "content": f"Test content {i}",
-            "embedding": [0.1 * i] * 384,
+            "embedding": make_embedding(0.1 * i),
             "source_url": f"https://example.com/{i}",
             "chunk_index": i,
             "metadata": {"amc_name": "Test AMC"},
@@ -211,7 +224,7 @@ def test_reset(vectordb):
         {
             "chunk_id": "test-1",
             "content": "Test content",
-            "embedding": [0.1] * 384,
+            "embedding": make_embedding(0.1),
             "source_url": "https://example.com/1",
             "chunk_index": 0,
             "metadata": {"amc_name": "Test AMC"},
@@ -254,28 +267,123 @@ def test_metadata_preparation(vectordb):
     assert "amc_id" in metadata
     assert "title" in metadata
     assert "structured_info_json" in metadata
+    assert json.loads(metadata["structured_info_json"]) == chunk["metadata"]["structured_info"]
     assert metadata["chunk_index"] == 5
 
 
-def test_batch_addition(vectordb):
+@pytest.mark.parametrize("batch_size,expected_batches", [(100, 2), (250, 1)])
+def test_batch_addition(vectordb, monkeypatch, batch_size, expected_batches):
     """Test adding chunks in batches."""
-    # Create 150 chunks to test batch processing
+    # Create 150 chunks to test batch processing; row i of the embedding
+    # matrix has every component set to 0.01 * i
+    num_chunks = 150
+    scales = np.arange(num_chunks, dtype=np.float32) * 0.01
+    embeddings = np.repeat(scales[:, None], EMBEDDING_DIM, axis=1)
     chunks = [
         {
             "chunk_id": f"test-{i}",
             "content": f"Test content {i}",
-            "embedding": [0.01 * i] * 384,
+            "embedding": embeddings[i],
             "source_url": f"https://example.com/{i}",
             "chunk_index": i,
             "metadata": {"amc_name": "Test AMC"},
         }
-        for i in range(150)
+        for i in range(num_chunks)
     ]
 
-    vectordb.add_chunks(chunks)
+    # Count the collection.add() calls made for the batches
+    add_calls = []
+    collection_add = vectordb.collection.add
+
+    def counting_add(**kwargs):
+        add_calls.append(len(kwargs["ids"]))
+        return collection_add(**kwargs)
+
+    monkeypatch.setattr(vectordb.collection, "add", counting_add)
+
+    vectordb.add_chunks(chunks, batch_size=batch_size)
+
+    assert len(add_calls) == expected_batches
+    assert sum(add_calls) == num_chunks
 
     count = vectordb.count()
-    assert count == 150
+    assert count == num_chunks
+
+
+def test_add_chunks_skips_wrong_dimension_embedding(vectordb):
+    """Test that one malformed embedding does not drop the rest of its batch."""
+    chunks = [
+        {
+            "chunk_id": f"test-{i}",
+            "content": f"Test content {i}",
+            "embedding": make_embedding(0.1),
+            "source_url": f"https://example.com/{i}",
+            "chunk_index": i,
+            "metadata": {"amc_name": "Test AMC"},
+        }
+        for i in range(3)
+    ]
+    chunks[1]["embedding"] = np.full(EMBEDDING_DIM // 2, 0.1, dtype=np.float32)
+
+    result = vectordb.add_chunks(chunks)
+
+    assert result["added"] == 2
+    assert vectordb.count() == 2
+    assert vectordb.get_by_id(["test-1"])["ids"] == []
+
+
+def test_add_chunks_skips_duplicate_content(vectordb):
+    """Test that chunks with content already stored for their source are skipped."""
+    chunks = [
+        {
+            "chunk_id": f"test-{i}",
+            "content": "Same content in every chunk",
+            "embedding": make_embedding(0.1),
+            "source_url": "https://example.com/1",
+            "chunk_index": i,
+            "metadata": {"amc_name": "Test AMC"},
+        }
+        for i in range(3)
+    ]
+
+    # Duplicates within a single call
+    result = vectordb.add_chunks(chunks[:2], skip_duplicates=True)
+    assert result == {"added": 1, "skipped_duplicates": 1, "skipped_ids": ["test-1"]}
+    assert vectordb.count() == 1
+
+    # Content already stored by an earlier call
+    result = vectordb.add_chunks(chunks[2:], skip_duplicates=True)
+    assert result == {"added": 0, "skipped_duplicates": 1, "skipped_ids": ["test-2"]}
+    assert vectordb.count() == 1
+
+    # Re-adding a chunk stored under its own ID is not reported as skipped
+    result = vectordb.add_chunks(chunks[:1], skip_duplicates=True)
+    assert result == {"added": 0, "skipped_duplicates": 0, "skipped_ids": []}
+    assert vectordb.count() == 1
+
+    # Duplicate skipping is off by default
+    vectordb.add_chunks(chunks[2:])
+    assert vectordb.count() == 2
+
+
+def test_add_chunks_keeps_duplicate_content_from_other_sources(vectordb):
+    """Test that identical content from another source is not skipped."""
+    chunks = [
+        {
+            "chunk_id": f"test-{i}",
+            "content": "Same content in every chunk",
+            "embedding": make_embedding(0.1),
+            "source_url": f"https://example.com/{i}",
+            "chunk_index": 0,
+            "metadata": {"amc_name": amc_name},
+        }
+        for i, amc_name in enumerate(["HDFC", "SBI"])
+    ]
+
+    result = vectordb.add_chunks(chunks, skip_duplicates=True)
+
+    assert result == {"added": 2, "skipped_duplicates": 0, "skipped_ids": []}
+    assert vectordb.get_by_id(["test-1"])["metadatas"][0]["amc_name"] == "SBI"
 
 
 def test_query_with_filters(vectordb):
@@ -284,7 +392,7 @@ def test_query_with_filters(vectordb):
         {
             "chunk_id": "test-1",
             "content": "HDFC fund with high returns",
-            "embedding": [0.1] * 384,
+            "embedding": make_embedding(0.1),
             "source_url": "https://example.com/1",
             "chunk_index": 0,
             "metadata": {"amc_name": "HDFC"},
@@ -292,7 +400,7 @@ def test_query_with_filters(vectordb):
         {
             "chunk_id": "test-2",
             "content": "SBI fund with moderate returns",
-            "embedding": [0.2] * 384,
+            "embedding": make_embedding(0.2),
             "source_url": "https://example.com/2",
             "chunk_index": 0,
             "metadata": {"amc_name": "SBI"},
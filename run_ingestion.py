@@ -14,29 +14,70 @@ Usage:
 
 import argparse
 import logging
+import queue
 import sys
 import os
 import json
+from collections import Counter
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 # Add data_ingestion to path
 sys.path.insert(0, str(Path(__file__).parent / "data_ingestion"))
 
+from json_records import load_json_records
 from pipeline import IngestionPipeline
 from validator import DataValidator
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler("ingestion_pipeline.log"),
-    ],
-)
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
 logger = logging.getLogger(__name__)
 
 
+def setup_logging(verbose: bool = False) -> QueueListener:
+    """
+    Configure logging to the console and to ingestion_pipeline.log.
+
+    Log file writes go through a queue and are done by a background
+    listener thread, so they never block the pipeline. Console output stays
+    synchronous to keep it in order with the printed summaries. force=True
+    replaces the handlers installed by the imported modules.
+
+    Args:
+        verbose: Enable DEBUG level logging
+
+    Returns:
+        The started log file listener; the caller must stop it
+    """
+    file_handler = logging.FileHandler("ingestion_pipeline.log")
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    log_queue = queue.Queue(-1)
+    queue_handler = QueueHandler(log_queue)
+    # Only the message is rendered here; the file handler applies LOG_FORMAT
+    queue_handler.setFormatter(logging.Formatter("%(message)s"))
+    listener = QueueListener(log_queue, file_handler)
+    listener.start()
+
+    logging.basicConfig(
+        level=logging.DEBUG if verbose else logging.INFO,
+        format=LOG_FORMAT,
+        handlers=[
+            logging.StreamHandler(sys.stdout),
+            queue_handler,
+        ],
+        force=True,
+    )
+
+    return listener
+
+
 def load_source_urls(filepath: str) -> dict:
     """
     Load and validate source URLs file.
@@ -51,11 +92,10 @@ def load_source_urls(filepath: str) -> dict:
         FileNotFoundError: If file doesn't exist
         json.JSONDecodeError: If file is not valid JSON
     """
-    if not os.path.exists(filepath):
-        raise FileNotFoundError(f"Source URLs file not found: {filepath}")
-
-    with open(filepath, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    # open() raises FileNotFoundError itself, so no separate existence check
+    with open(filepath, "rb") as f:
+        # orjson.JSONDecodeError subclasses json.JSONDecodeError
+        data = orjson.loads(f.read()) if ORJSON_AVAILABLE else json.load(f)
 
     logger.info(f"Loaded source URLs for {len(data)} AMCs")
     for amc, urls in data.items():
@@ -64,6 +104,43 @@ def load_source_urls(filepath: str) -> dict:
     return data
 
 
+def write_json(filepath: str, data) -> None:
+    """
+    Write data to a JSON file (2-space indent, non-ASCII kept as UTF-8).
+
+    Uses orjson when available and falls back to the stdlib encoder for
+    values orjson cannot serialize. The data is written to a temporary file
+    that then replaces ``filepath``, so a crash mid-write never leaves a
+    truncated file behind.
+
+    Args:
+        filepath: Output file path
+        data: JSON-serializable data
+    """
+    payload = None
+    if ORJSON_AVAILABLE:
+        try:
+            payload = orjson.dumps(
+                data,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+            )
+        except TypeError:
+            pass
+
+    if payload is None:
+        payload = json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+
+    tmp_path = f"{filepath}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
 def validate_existing_data(output_dir: str = "data") -> None:
     """
     Run validation on existing data files.
@@ -73,37 +150,54 @@ def validate_existing_data(output_dir: str = "data") -> None:
     """
     logger.info("Running validation on existing data")
 
-    validator = DataValidator()
-
     # Load data files
     scraped_data = None
     processed_docs = None
     chunks = None
 
     try:
-        with open(os.path.join(output_dir, "scraped_content.json"), "r", encoding="utf-8") as f:
-            data = json.load(f)
-            scraped_data = data.get("scraped_content", [])
-            logger.info(f"Loaded {len(scraped_data)} scraped documents")
+        scraped_data = load_json_records(
+            os.path.join(output_dir, "scraped_content.json"), "scraped_content"
+        )
+        logger.info(f"Loaded {len(scraped_data)} scraped documents")
     except FileNotFoundError:
         logger.warning("Scraped content file not found, skipping")
 
     try:
-        with open(os.path.join(output_dir, "processed_content.json"), "r", encoding="utf-8") as f:
-            data = json.load(f)
-            processed_docs = data.get("processed_documents", [])
-            logger.info(f"Loaded {len(processed_docs)} processed documents")
+        processed_docs = load_json_records(
+            os.path.join(output_dir, "processed_content.json"), "processed_documents"
+        )
+        logger.info(f"Loaded {len(processed_docs)} processed documents")
     except FileNotFoundError:
         logger.warning("Processed content file not found, skipping")
 
     try:
-        with open(os.path.join(output_dir, "chunks_with_embeddings.json"), "r", encoding="utf-8") as f:
-            data = json.load(f)
-            chunks = data.get("chunks", [])
-            logger.info(f"Loaded {len(chunks)} chunks")
+        # Stream-parsed, so the raw file text is never held next to the chunks
+        chunks = load_json_records(os.path.join(output_dir, "chunks_with_embeddings.json"), "chunks")
+        logger.info(f"Loaded {len(chunks)} chunks")
     except FileNotFoundError:
         logger.warning("Chunks file not found, skipping")
 
+    validate_data(output_dir, scraped_data, processed_docs, chunks)
+
+
+def validate_data(
+    output_dir: str,
+    scraped_data: Optional[List[Dict]] = None,
+    processed_docs: Optional[List[Dict]] = None,
+    chunks: Optional[List[Dict]] = None,
+) -> None:
+    """
+    Validate pipeline data, save the results and print a summary.
+
+    Args:
+        output_dir: Directory where validation_results.json is written
+        scraped_data: Scraped documents
+        processed_docs: Processed documents
+        chunks: Chunks with embeddings
+    """
+    validator = DataValidator()
+
     # Run validation
     results = validator.run_full_validation(
         scraped_data=scraped_data,
@@ -113,8 +207,7 @@ def validate_existing_data(output_dir: str = "data") -> None:
     )
 
     # Save validation results
-    with open(os.path.join(output_dir, "validation_results.json"), "w", encoding="utf-8") as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
+    write_json(os.path.join(output_dir, "validation_results.json"), results)
 
     # Print summary
     print("\n" + "=" * 80)
@@ -137,16 +230,18 @@ def validate_existing_data(output_dir: str = "data") -> None:
             print(f"  Issues found: {len(stage_results['issues'])}")
             if len(stage_results["issues"]) > 0:
                 print("  Issue types:")
-                issue_types = {}
-                for issue in stage_results["issues"]:
-                    issue_type = issue.get("type", "unknown")
-                    issue_types[issue_type] = issue_types.get(issue_type, 0) + 1
-                for issue_type, count in issue_types.items():
+                issue_types = Counter(
+                    issue.get("type", "unknown") for issue in stage_results["issues"]
+                )
+                for issue_type, count in issue_types.most_common():
                     print(f"    - {issue_type}: {count}")
 
         if "duplicate_count" in stage_results:
             print(f"  Duplicates found: {stage_results['duplicate_count']}")
 
+        if "near_duplicate_count" in stage_results:
+            print(f"  Near-duplicates found: {stage_results['near_duplicate_count']}")
+
         if "unique_sources" in stage_results:
             print(f"  Unique sources: {stage_results['unique_sources']}")
 
@@ -160,7 +255,7 @@ def validate_existing_data(output_dir: str = "data") -> None:
     logger.info(f"Validation results saved to {output_dir}/validation_results.json")
 
 
-def run_pipeline(args: argparse.Namespace) -> int:
+def run_pipeline(args: argparse.Namespace) -> Tuple[int, Dict[str, List[Dict]]]:
     """
     Run the ingestion pipeline.
 
@@ -168,7 +263,9 @@ def run_pipeline(args: argparse.Namespace) -> int:
         args: Command-line arguments
 
     Returns:
-        Exit code (0 for success, 1 for failure)
+        (exit_code, outputs) tuple: exit code is 0 for success and 1 for
+        failure; outputs holds the pipeline's in-memory data on success
+        (see IngestionPipeline.outputs) and is empty otherwise
     """
     try:
         # Validate source URLs file exists
@@ -200,20 +297,20 @@ def run_pipeline(args: argparse.Namespace) -> int:
         # Check for errors
         if stats.get("errors"):
             logger.error(f"Pipeline completed with {len(stats['errors'])} errors")
-            return 1
+            return 1, {}
 
         logger.info("Pipeline completed successfully!")
-        return 0
+        return 0, pipeline.outputs
 
     except FileNotFoundError as e:
         logger.error(f"File not found: {e}")
-        return 1
+        return 1, {}
     except json.JSONDecodeError as e:
         logger.error(f"Invalid JSON in source URLs file: {e}")
-        return 1
+        return 1, {}
     except Exception as e:
         logger.error(f"Pipeline failed with error: {e}", exc_info=True)
-        return 1
+        return 1, {}
 
 
 def main():
@@ -294,31 +391,35 @@ Examples:
 
     args = parser.parse_args()
 
-    # Set log level
-    if args.verbose:
-        logging.getLogger().setLevel(logging.DEBUG)
-
-    # Print banner
-    print("\n" + "=" * 80)
-    print("MUTUAL FUNDS FAQ CHATBOT - DATA INGESTION PIPELINE")
-    print("=" * 80)
-    print()
-
-    # Run validation only if requested
-    if args.validate_only:
-        validate_existing_data(args.output_dir)
-        return 0
-
-    # Run pipeline
-    exit_code = run_pipeline(args)
-
-    # Run validation after pipeline
-    if exit_code == 0 and not args.skip_scraping:
-        logger.info("\nRunning post-pipeline validation...")
-        try:
+    log_listener = setup_logging(verbose=args.verbose)
+    try:
+        # Print banner
+        print("\n" + "=" * 80)
+        print("MUTUAL FUNDS FAQ CHATBOT - DATA INGESTION PIPELINE")
+        print("=" * 80)
+        print()
+
+        # Run validation only if requested
+        if args.validate_only:
             validate_existing_data(args.output_dir)
-        except Exception as e:
-            logger.warning(f"Post-pipeline validation failed: {e}")
+            return 0
+
+        # Run pipeline
+        exit_code, outputs = run_pipeline(args)
+
+        # Run validation after pipeline on the data still in memory
+        if exit_code == 0 and not args.skip_scraping:
+            logger.info("\nRunning post-pipeline validation...")
+            try:
+                if outputs:
+                    validate_data(args.output_dir, **outputs)
+                else:
+                    validate_existing_data(args.output_dir)
+            except Exception as e:
+                logger.warning(f"Post-pipeline validation failed: {e}")
+    finally:
+        # Flush queued records to the log file before exiting
+        log_listener.stop()
 
     sys.exit(exit_code)
 